@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import streamlit as st
 
 # Set page config - must be the first Streamlit command
@@ -18,16 +20,19 @@ st.set_page_config(
 )
 
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
+import aiohttp
+import asyncio
+import xlsxwriter
+import lxml.html
+from lxml import etree
 import io
 import logging
+import re
 from typing import Optional
 from datetime import datetime
-import json
+import orjson
 import os
 from pathlib import Path
-import time
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -35,143 +40,196 @@ logger = logging.getLogger(__name__)
 
 # Constants
 URL = "https://bospop.nl/faq/"
+# All FAQ source pages; fetched concurrently if Bospop ever splits the
+# FAQ across sub-pages
+URLS = [URL]
 HEADERS = {
     'User-Agent': 'BospopFAQBot/1.0',
-    'From': 'e.wolter@bospop.nl'
+    'From': 'e.wolter@bospop.nl',
+    'Accept-Encoding': 'gzip, br'
 }
 DATA_DIR = Path("data")
 DATA_FILE = DATA_DIR / "faq_cache.json"
+COLUMNS = ('Category', 'Question', 'Answer')
+
+# XPath expressions compiled once at import; evaluating them walks the
+# tree in C instead of per-node Python traversal
+_FAQ_ITEMS = etree.XPath(
+    "//div[contains(@class,'jupiterx-single-advanced-accordion-wrapper')]")
+_ITEM_CATEGORY = etree.XPath(
+    "ancestor::div[contains(@class,'jupiterx-advanced-accordion-wrapper')]"
+    "/preceding::h2[contains(@class,'elementor-heading-title')][1]//text()")
+_ITEM_QUESTION = etree.XPath(".//span[contains(@class,'jx-ac-title')]//text()")
+_ITEM_ANSWER = etree.XPath(
+    ".//div[contains(@class,'jupiterx-ac-content-is-editor')]//text()")
+
+# Compiled once; collapses runs of whitespace when cleaning scraped text
+_WS = re.compile(r'\s+')
+
 
+def _clean(text: str) -> str:
+    """Collapse whitespace runs to single spaces and trim the ends"""
+    return _WS.sub(' ', text).strip()
+
+
+async def _fetch(session: aiohttp.ClientSession, url: str,
+                 etag: Optional[str]) -> tuple[int, Optional[str], bytes]:
+    """Fetch one page, returning (status, etag, body)"""
+    headers = {'If-None-Match': etag} if etag else {}
+    async with session.get(url, headers=headers) as response:
+        response.raise_for_status()
+        return response.status, response.headers.get('ETag'), await response.read()
+
+
+async def _fetch_all(urls: list[str],
+                     etags: dict[str, str]) -> list[tuple[int, Optional[str], bytes]]:
+    """Fetch all FAQ pages concurrently; latencies overlap instead of summing"""
+    timeout = aiohttp.ClientTimeout(total=10)
+    async with aiohttp.ClientSession(headers=HEADERS, timeout=timeout) as session:
+        return await asyncio.gather(
+            *[_fetch(session, url, etags.get(url)) for url in urls])
+
+@st.cache_data(ttl=3600, show_spinner=False)
 def scrape_bospop_faq() -> Optional[pd.DataFrame]:
     """
     Scrapes FAQ data from Bospop website with error handling and validation.
+    All source pages are fetched concurrently; results are cached for an
+    hour, and conditional GETs with the last seen ETags let the server
+    answer 304 so no parsing work is done when nothing changed.
     Returns None if scraping fails.
     """
     try:
         logger.info(f"Starting FAQ scrape at {datetime.now()}")
-        response = requests.get(URL, headers=HEADERS, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        data = {
-            'Category': [],
-            'Question': [],
-            'Answer': []
-        }
-        
-        # Find all category sections
-        category_sections = soup.find_all('h2', class_='elementor-heading-title')
-        
-        for category_section in category_sections:
-            category = category_section.text.strip()
-            
-            # Find the accordion container following this category
-            accordion_container = category_section.find_next('div', class_='jupiterx-advanced-accordion-wrapper')
-            if accordion_container:
-                # Find all FAQ items in this category
-                faq_items = accordion_container.find_all('div', class_='jupiterx-single-advanced-accordion-wrapper')
-                
-                for item in faq_items:
-                    # Extract question
-                    question = item.find('span', class_='jx-ac-title').text.strip()
-                    
-                    # Extract answer
-                    answer_div = item.find('div', class_='jupiterx-ac-content-is-editor')
-                    if answer_div:
-                        answer = answer_div.get_text(strip=True)
-                    else:
-                        answer = ""
-                    
-                    # Append to lists
-                    data['Category'].append(category)
-                    data['Question'].append(question)
-                    data['Answer'].append(answer)
-        
+        etags = dict(st.session_state.get('etags', {}))
+        if st.session_state.get('faq_data') is None:
+            etags = {}
+        results = asyncio.run(_fetch_all(URLS, etags))
+
+        statuses = [status for status, _, _ in results]
+        if statuses and all(status == 304 for status in statuses):
+            logger.info("FAQ pages unchanged (HTTP 304), reusing cached data")
+            cached = st.session_state.faq_data
+            if not isinstance(cached, pd.DataFrame):
+                cached = pd.DataFrame(cached)
+            return cached
+        if any(status == 304 for status in statuses):
+            # Mixed freshness: refetch everything unconditionally so the
+            # unchanged pages' items are not dropped from the rebuild
+            results = asyncio.run(_fetch_all(URLS, {}))
+
+        for url, (_, etag, _) in zip(URLS, results):
+            if etag:
+                etags[url] = etag
+        st.session_state['etags'] = etags
+
+        rows = []
+
+        # Single pass over all FAQ items per page; category is recovered
+        # per item by climbing to the h2 preceding its accordion wrapper
+        for _, _, body in results:
+            tree = lxml.html.fromstring(body)
+            for item in _FAQ_ITEMS(tree):
+                category_text = _ITEM_CATEGORY(item)
+                category = _clean(category_text[0]) if category_text else ""
+
+                # Extract question
+                question = _clean("".join(_ITEM_QUESTION(item)))
+
+                # Extract answer
+                answer = _clean("".join(_ITEM_ANSWER(item)))
+
+                rows.append((category, question, answer))
+
         # Data validation and cleaning
-        df = pd.DataFrame(data)
+        df = pd.DataFrame(rows, columns=list(COLUMNS))
         df = df.dropna(subset=['Question', 'Answer'])  # Remove rows with missing Q&A
         df = df.drop_duplicates()  # Remove any duplicates
-        
-        # Normalize text
-        for col in df.columns:
-            df[col] = df[col].str.strip().str.replace('\s+', ' ', regex=True)
-        
+
         logger.info(f"Successfully scraped {len(df)} FAQ items")
         return df
         
-    except requests.exceptions.RequestException as e:
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         logger.error(f"Request failed: {str(e)}")
         return None
     except Exception as e:
         logger.error(f"Scraping failed: {str(e)}")
         return None
 
-def create_excel_file(df: pd.DataFrame) -> io.BytesIO:
-    """Separate function to handle Excel file creation"""
+@st.cache_data(show_spinner=False)
+def create_excel_file(records: list[dict] | pd.DataFrame) -> bytes:
+    """
+    Build the Excel payload; cached until the FAQ data changes.
+    Accepts either the cached records list or a DataFrame, so the
+    cache-load path never has to construct a DataFrame just to export.
+    """
+    if isinstance(records, pd.DataFrame):
+        columns = list(records.columns)
+        rows = records.itertuples(index=False, name=None)
+    else:
+        columns = list(COLUMNS)
+        rows = (tuple(rec.get(col, "") for col in columns) for rec in records)
+
     output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        # Write DataFrame to Excel
-        df.to_excel(writer, index=False, sheet_name='FAQ')
-        
-        # Get workbook and worksheet objects
-        workbook = writer.book
-        worksheet = writer.sheets['FAQ']
-        
-        # Define formats
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#4F81BD',
-            'font_color': 'white',
-            'border': 1,
-            'text_wrap': True
-        })
-        
-        cell_format = workbook.add_format({
-            'text_wrap': True,
-            'border': 1
-        })
-        
-        # Set column widths
-        worksheet.set_column('A:A', 20)  # Category column
-        worksheet.set_column('B:B', 40)  # Question column
-        worksheet.set_column('C:C', 60)  # Answer column
-        
-        # Apply header format
-        for col_num, value in enumerate(df.columns.values):
-            worksheet.write(0, col_num, value, header_format)
-            
-        # Apply cell format to all data cells
-        for row in range(len(df)):
-            for col in range(len(df.columns)):
-                worksheet.write(row + 1, col, df.iloc[row, col], cell_format)
-    return output
+    # constant_memory flushes each completed row to the output stream,
+    # so peak memory stays flat regardless of the number of FAQ items.
+    # It requires rows to be written strictly top-to-bottom.
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    worksheet = workbook.add_worksheet('FAQ')
+
+    # Define formats
+    header_format = workbook.add_format({
+        'bold': True,
+        'bg_color': '#4F81BD',
+        'font_color': 'white',
+        'border': 1,
+        'text_wrap': True
+    })
+
+    cell_format = workbook.add_format({
+        'text_wrap': True,
+        'border': 1
+    })
+
+    # Set column widths (before any data writes)
+    worksheet.set_column('A:A', 20)  # Category column
+    worksheet.set_column('B:B', 40)  # Question column
+    worksheet.set_column('C:C', 60)  # Answer column
+
+    # Apply header format
+    worksheet.write_row(0, 0, columns, header_format)
+
+    # All columns hold plain strings, so write_string skips the
+    # isinstance type-dispatch chain that worksheet.write runs per cell
+    for r, row in enumerate(rows, start=1):
+        for c, value in enumerate(row):
+            worksheet.write_string(r, c, value, cell_format)
+
+    workbook.close()
+    return output.getvalue()
 
 def save_data_to_file(df: pd.DataFrame, timestamp: str):
     """Save DataFrame and timestamp to JSON file"""
     try:
         DATA_DIR.mkdir(exist_ok=True)
-        
+
         data = {
             'faq_data': df.to_dict(orient='records'),
             'last_update': timestamp
         }
-        
-        with open(DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+
+        # orjson serializes in C and emits UTF-8 bytes directly
+        DATA_FILE.write_bytes(orjson.dumps(data))
         logger.info(f"Successfully saved data to {DATA_FILE}")
     except Exception as e:
         logger.error(f"Error saving data to file: {str(e)}")
         raise
 
-def load_data_from_file() -> tuple[Optional[pd.DataFrame], Optional[str]]:
-    """Load DataFrame and timestamp from JSON file"""
+def load_data_from_file() -> tuple[Optional[list[dict]], Optional[str]]:
+    """Load FAQ records and timestamp from JSON file"""
     try:
         if DATA_FILE.exists():
-            with open(DATA_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                df = pd.DataFrame(data['faq_data'])
-                return df, data['last_update']
+            data = orjson.loads(DATA_FILE.read_bytes())
+            return data['faq_data'], data['last_update']
     except Exception as e:
         logger.error(f"Error loading cached data: {str(e)}")
     return None, None
@@ -179,18 +237,19 @@ def load_data_from_file() -> tuple[Optional[pd.DataFrame], Optional[str]]:
 def initialize_session_state():
     """Initialize session state variables if they don't exist"""
     if 'faq_data' not in st.session_state or 'last_update' not in st.session_state:
-        # Try to load from file first
-        df, timestamp = load_data_from_file()
-        
+        # Try to load from file first; this path keeps the raw records
+        # list and never builds a DataFrame
+        faq_data, timestamp = load_data_from_file()
+
         # If no cached data, fetch new data
-        if df is None or timestamp is None:
-            df = scrape_bospop_faq()
+        if faq_data is None or timestamp is None:
+            faq_data = scrape_bospop_faq()
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            if df is not None:
-                save_data_to_file(df, timestamp)
-        
+            if faq_data is not None:
+                save_data_to_file(faq_data, timestamp)
+
         # Update session state
-        st.session_state.faq_data = df
+        st.session_state.faq_data = faq_data
         st.session_state.last_update = timestamp
 
 def main():
@@ -210,6 +269,9 @@ def main():
     if st.button("Update FAQ Data", type="primary"):
         try:
             with st.spinner("FAQ data aan het ophalen..."):
+                # Explicit refresh must bypass the TTL memo; the
+                # conditional GET keeps this cheap when nothing changed
+                scrape_bospop_faq.clear()
                 new_faq_df = scrape_bospop_faq()
                 
                 if new_faq_df is None or len(new_faq_df) == 0:
@@ -220,8 +282,8 @@ def main():
                     save_data_to_file(new_faq_df, timestamp)
                     st.session_state.faq_data = new_faq_df
                     st.session_state.last_update = timestamp
-                    st.success("FAQ data succesvol bijgewerkt!")
-                    time.sleep(1)  # Give a moment for the success message to be visible
+                    # Toast is non-blocking and persists across the rerun
+                    st.toast("FAQ data succesvol bijgewerkt!", icon="✅")
                     st.rerun()
                 
         except Exception as e:
@@ -230,14 +292,18 @@ def main():
     
     # Show current data preview
     if st.session_state.faq_data is not None:
+        faq_data = st.session_state.faq_data
         with st.expander("Bekijk FAQ Data", expanded=True):
-            st.dataframe(st.session_state.faq_data)
+            # Only the interactive table needs a DataFrame
+            if not isinstance(faq_data, pd.DataFrame):
+                st.dataframe(pd.DataFrame(faq_data, columns=list(COLUMNS)))
+            else:
+                st.dataframe(faq_data)
         
         # Always show download button for current data
-        excel_file = create_excel_file(st.session_state.faq_data)
         st.download_button(
             label="Download Excel bestand",
-            data=excel_file.getvalue(),
+            data=create_excel_file(faq_data),
             file_name=f"bospop_faq_{datetime.now().strftime('%Y%m%d')}.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )